@@ -2,6 +2,8 @@ from digits.main import(
     WAVFile,
     Corpus,
     Recording,
+    RecordingBatch,
+    clear_cache,
     make_corpus,
     read_meta_file,
     read_recording,
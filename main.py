@@ -1,57 +1,197 @@
-import json
+import functools
+import mmap
+import os
 import pathlib
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
 
 import numpy as np
 import numpy.typing as npt
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional, the standard library parser gives the same dict
+    from json import loads as _json_loads
 
-def read_meta_file(file_path: str | pathlib.Path) -> dict[str, dict]:
+
+META_FILE_NAME = "audioMNIST_meta.txt"
+ACCENT_KEY = "accent"
+GENDER_KEY = "gender"
+
+# reading is I/O-bound, so the pool size follows the disk queue depth, not the CPU count
+_IO_WORKERS = 16
+_MIN_POOLED_READS = 32
+
+_SAMPLE_DTYPES: dict[int, type[np.signedinteger]] = {
+    16: np.int16,
+    32: np.int32,
+    64: np.int64,
+}
+
+
+def read_meta_file(
+    file_path: str | pathlib.Path, file_name: str = META_FILE_NAME
+) -> dict[str, dict]:
     """This functions reads the .txt file in the data-directory and turns it into a python dictionary.
 
     Args:
         file_path (str | pathlib.Path): path to data-directory
+        file_name (str): name of the .txt file inside the data-directory. Defaults to META_FILE_NAME
 
     Returns:
         dict[str, dict]: Python Dictionary to loop through in later functions/methods
     """
-    meta_data = list(Path(file_path).glob("*.txt"))
-    with Path.open(meta_data[0]) as text:
-        return json.load(text)
+    with open(os.path.join(file_path, file_name), "rb") as text:
+        return _json_loads(text.read())
 
 
-def read_wavfile(file_path: str | pathlib.Path) -> "WAVFile":
-    """This functions reads the .wav file using numpy.fromfile function. Creates attributes for the "WAVFile" object.
-    For more information on numpy.fromfiles go to https://numpy.org/doc/stable/reference/generated/numpy.fromfile.html
+@functools.lru_cache(maxsize=None)
+def _meta_index(
+    file_path: str, file_name: str
+) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    """This function reads the meta data once per data-directory and builds reverse indices from accent and gender
+    to speaker aliases. Accents are capitalized, so lookups are case-insensitive like in Corpus.add_accent.
 
     Args:
-        file_path (str | pathlib.Path): string specifying a path or pathlib.Path to .wav file
+        file_path (str): path to data-directory
+        file_name (str): name of the .txt file inside the data-directory
 
     Returns:
-        WAVFile: returns an object of class "WAVFile"
+        tuple[dict[str, set[str]], dict[str, set[str]]]: accent -> speaker aliases, gender -> speaker aliases
     """
-    with Path.open(Path(file_path), "rb") as file:
-        n_channels = int(np.fromfile(file, dtype="uint16", count=1, offset=22))
-        fs = int(np.fromfile(file, dtype="uint32", count=1))
-        bits_per_sample = int(np.fromfile(file, dtype="uint16", count=1, offset=6))
+    accent_index: dict[str, set[str]] = {}
+    gender_index: dict[str, set[str]] = {}
+    for speaker_alias, speaker_meta in read_meta_file(file_path, file_name).items():
+        for speakers_accent in speaker_meta[ACCENT_KEY].split("/"):
+            accent_index.setdefault(speakers_accent.capitalize(), set()).add(
+                speaker_alias
+            )
+        gender_index.setdefault(speaker_meta[GENDER_KEY], set()).add(speaker_alias)
 
-        if bits_per_sample == 16:
-            data = np.fromfile(file, dtype=np.int16, count=-1, offset=8)
+    return accent_index, gender_index
 
-        if bits_per_sample == 32:
-            data = np.fromfile(file, dtype=np.int32, count=-1, offset=8)
 
-        if bits_per_sample == 64:
-            data = np.fromfile(file, dtype=np.int64, count=-1, offset=8)
+def _read_header(file: BinaryIO) -> tuple[int, int, int, int]:
+    """This function walks the RIFF chunks of a .wav file, reads the fields of the "fmt " chunk and stops at the "data" chunk.
+    The file is left positioned at the first sample.
 
-        duration = float(data.size / fs)
+    Args:
+        file (BinaryIO): .wav file opened in binary mode
 
-        return WAVFile(
-            bits_per_sample, duration, Path(file_path).name, fs, n_channels, data
-        )
+    Raises:
+        ValueError: if the file is no RIFF/WAVE file or has no "fmt " chunk before its "data" chunk
+
+    Returns:
+        tuple[int, int, int, int]: n_channels, fs, bits_per_sample and size of the "data" chunk in bytes
+    """
+    riff = file.read(12)
+    if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError(f"{file.name} is not a RIFF/WAVE file")
+
+    fmt = None
+    while True:
+        chunk_header = file.read(8)
+        if len(chunk_header) < 8:
+            raise ValueError(f'{file.name} has no "data" chunk')
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError(f'{file.name} has no "fmt " chunk before its data')
+            _, n_channels, fs, _, _, bits_per_sample = fmt
+            return n_channels, fs, bits_per_sample, chunk_size
+
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", file.read(16))
+            chunk_size -= 16
+        file.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def read_wavfile(
+    file_path: str | pathlib.Path,
+    file_name: str | None = None,
+    use_mmap: bool = False,
+) -> "WAVFile":
+    """This functions reads the .wav file header with struct.unpack_from and the samples with a single readinto
+    into a preallocated numpy array. Creates attributes for the "WAVFile" object.
+    With use_mmap=True the file is mapped into memory instead and "data" is a read-only numpy.frombuffer view
+    sharing its pages with the OS file cache. The mapping keeps the file open until WAVFile.close() is called.
+    For more information on numpy.frombuffer go to https://numpy.org/doc/stable/reference/generated/numpy.frombuffer.html
+
+    Args:
+        file_path (str | pathlib.Path): string specifying a path or pathlib.Path to .wav file
+        file_name (str | None): name of the .wav file, if already known. Defaults to the last part of file_path
+        use_mmap (bool): map the file instead of copying the samples. Defaults to False
+
+    Raises:
+        ValueError: if the file is no valid .wav file or its bit depth is not 16, 32 or 64
+
+    Returns:
+        WAVFile: returns an object of class "WAVFile"
+    """
+    if file_name is None:
+        file_name = os.path.basename(file_path)
+
+    with open(file_path, "rb") as file:
+        n_channels, fs, bits_per_sample, data_size = _read_header(file)
+        if bits_per_sample not in _SAMPLE_DTYPES:
+            raise ValueError(
+                f"{file_path} has {bits_per_sample} bits per sample, "
+                f"only {sorted(_SAMPLE_DTYPES)} are supported"
+            )
+        dtype = np.dtype(_SAMPLE_DTYPES[bits_per_sample])
+
+        if use_mmap:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            data_offset = file.tell()
+            count = min(data_size, len(buffer) - data_offset) // dtype.itemsize
+            data = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_offset)
+        else:
+            buffer = None
+            data = np.empty(data_size // dtype.itemsize, dtype=dtype)
+            n_read = file.readinto(data)
+            data = data[: n_read // dtype.itemsize]
+
+    duration = float(data.size / fs)
+
+    return WAVFile(
+        bits_per_sample,
+        duration,
+        file_name,
+        fs,
+        n_channels,
+        data,
+        buffer,
+    )
+
+
+def _pcm_to_float32(
+    samples: npt.NDArray[np.int_], out: npt.NDArray[np.float32]
+) -> None:
+    """Converts integer PCM samples into "out" as float32 normalized to [-1, 1], in one fused multiply.
+
+    Args:
+        samples (npt.NDArray[np.int_]): 16, 32 or 64 bit PCM samples
+        out (npt.NDArray[np.float32]): preallocated array of the same size
+    """
+    scale = np.float32(2.0 ** (1 - 8 * samples.dtype.itemsize))
+    np.multiply(samples, scale, out=out, casting="unsafe")
 
 
 class WAVFile:
+    __slots__ = (
+        "bits_per_sample",
+        "duration",
+        "file_name",
+        "fs",
+        "n_channels",
+        "data",
+        "buffer",
+    )
+
     def __init__(
         self,
         bits_per_sample: int,
@@ -60,6 +200,7 @@ class WAVFile:
         fs: int,
         n_channels: int,
         data: npt.NDArray[np.int_],
+        buffer: mmap.mmap | None = None,
     ):
         self.bits_per_sample = bits_per_sample
         self.duration = duration
@@ -67,11 +208,47 @@ class WAVFile:
         self.fs = fs
         self.n_channels = n_channels
         self.data = data
+        self.buffer = buffer
+
+    def as_float32(self) -> npt.NDArray[np.float32]:
+        """Converts "data" to float32 samples normalized to [-1, 1] by 2**(bits_per_sample - 1), e.g. 32768 for 16-bit files.
+
+        Returns:
+            npt.NDArray[np.float32]: new array with the normalized samples
+        """
+        out = np.empty(self.data.size, dtype=np.float32)
+        _pcm_to_float32(self.data, out)
+        return out
+
+    def close(self) -> None:
+        """Unmaps the .wav file backing "data", if any (see read_wavfile with use_mmap=True). Afterwards "data" is empty.
+        Raises BufferError and leaves the object unchanged if views of "data" are still referenced elsewhere.
+        WAVFiles of cached recordings (see read_recording) are never mapped, so closing them changes nothing.
+        """
+        if self.buffer is None:
+            return
+        dtype, count = self.data.dtype, self.data.size
+        offset = (
+            self.data.ctypes.data - np.frombuffer(self.buffer, np.uint8).ctypes.data
+        )
+
+        self.data = np.empty(0, dtype=dtype)
+        try:
+            self.buffer.close()
+        except BufferError:
+            self.data = np.frombuffer(
+                self.buffer, dtype=dtype, count=count, offset=offset
+            )
+            raise
+        self.buffer = None
 
 
 def read_recording(file_path: str | pathlib.Path) -> "Recording":
     """This function creates a "Recording" object by reading out information from the file name (see Args).
     Creates attributes for the "Recording" object.
+    Recordings are cached per absolute path, so chained "Corpus" methods do not read the same file twice.
+    Cached recordings are shared, so their samples are read-only and not backed by a memory map.
+    The cache is unbounded and keeps all samples alive after every "Corpus" is gone; call clear_cache() to free them.
 
     Args:
         file_path (str | pathlib.Path): string specifying a path or pathlib.Path to .wav file
@@ -79,14 +256,42 @@ def read_recording(file_path: str | pathlib.Path) -> "Recording":
     Returns:
         Recording: returns an object of class "Recording"
     """
-    digit = int(Path(file_path).name[0])
-    speaker = str(Path(file_path).name[2:4])
-    index = int(Path(file_path).name[5 : Path(file_path).name.find(".")])
+    return _read_recording_cached(os.path.abspath(file_path))
+
 
-    return Recording(digit, index, speaker, read_wavfile(file_path))
+@functools.lru_cache(maxsize=None)
+def _read_recording_cached(file_path: str) -> "Recording":
+    """This function reads the recording behind read_recording once per path and marks its samples read-only.
+
+    Args:
+        file_path (str): absolute path to .wav file
+
+    Returns:
+        Recording: returns an object of class "Recording"
+    """
+    file_name = os.path.basename(file_path)
+    stem, _, _ = file_name.partition(".")
+    digit = int(stem[0])
+    speaker = stem[2:4]
+    index = int(stem[5:])
+
+    wav = read_wavfile(file_path, file_name)
+    wav.data.flags.writeable = False
+
+    return Recording(digit, index, speaker, wav)
+
+
+def clear_cache() -> None:
+    """This function empties the caches of read_recording and of the meta data. This frees the cached samples
+    and is needed after files on disk changed.
+    """
+    _read_recording_cached.cache_clear()
+    _meta_index.cache_clear()
 
 
 class Recording:
+    __slots__ = ("digit", "index", "speaker", "wav")
+
     def __init__(self, digit: int, index: int, speaker: str, wav: WAVFile):
         self.digit = digit
         self.index = index
@@ -94,145 +299,232 @@ class Recording:
         self.wav = wav
 
 
-def make_corpus(dataset_path: str | pathlib.Path) -> "Corpus":
+@dataclass(slots=True)
+class RecordingBatch:
+    """Structure-of-arrays view of the recordings of a "Corpus", one entry per recording in the same order.
+    "data" holds the sample arrays themselves (no copy), since recordings differ in length.
+    """
+
+    digit: npt.NDArray[np.int8]
+    index: npt.NDArray[np.int32]
+    speaker: npt.NDArray[np.str_]
+    fs: npt.NDArray[np.int32]
+    data: list[npt.NDArray[np.int_]]
+
+    def as_float32(self) -> list[npt.NDArray[np.float32]]:
+        """Converts all sample arrays to float32 normalized to [-1, 1] like WAVFile.as_float32.
+        Every array is written into one preallocated float32 array at its offset, so the returned arrays are views
+        into a single allocation.
+
+        Returns:
+            list[npt.NDArray[np.float32]]: normalized samples, in the order of "data"
+        """
+        ends = np.cumsum([data.size for data in self.data], dtype=np.int64)
+        out = np.empty(ends[-1] if ends.size else 0, dtype=np.float32)
+        converted = []
+        for data, end in zip(self.data, ends):
+            part = out[end - data.size : end]
+            _pcm_to_float32(data, part)
+            converted.append(part)
+
+        return converted
+
+
+def _iter_wavs(directory: str | pathlib.Path) -> Iterator[str]:
+    """This function yields the paths of all .wav files inside a directory by using os.scandir.
+
+    Args:
+        directory (str | pathlib.Path): string specifying a path or pathlib.Path to a speaker directory
+
+    Yields:
+        str: path to a .wav file
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".wav") and entry.is_file():
+                yield entry.path
+
+
+def _read_recordings(
+    dataset_path: str | pathlib.Path, speakers: Iterable[str]
+) -> list[Recording]:
+    """This function reads all recordings of the given speakers. The paths are collected first and, if there are
+    enough of them to pay for the threads, read in a thread pool so the disk latency of cold files overlaps.
+    The order of the paths is preserved.
+
+    Args:
+        dataset_path (str | pathlib.Path): string specifying a path or pathlib.Path to data-directory
+        speakers (Iterable[str]): speaker aliases, i.e. names of the speaker directories
+
+    Returns:
+        list[Recording]: objects of class "Recording"
+    """
+    base = os.fspath(dataset_path)
+    paths = [
+        path
+        for speaker in speakers
+        for path in _iter_wavs(os.path.join(base, speaker))
+    ]
+    if len(paths) < _MIN_POOLED_READS:
+        return [read_recording(path) for path in paths]
+
+    with ThreadPoolExecutor(max_workers=_IO_WORKERS) as executor:
+        return list(executor.map(read_recording, paths))
+
+
+def make_corpus(
+    dataset_path: str | pathlib.Path, meta_file_name: str = META_FILE_NAME
+) -> "Corpus":
     """This function creates an empty object from class "Corpus".
     Inside this object, we can add different speakers/recordings by using methods from class "Corpus".
+    The dataset path is resolved once here, so the caches are keyed on absolute paths.
 
     Args:
         dataset_path (str | pathlib.Path): string specifying a path or pathlib.Path to .wav file
+        meta_file_name (str): name of the meta data .txt file inside the data-directory. Defaults to META_FILE_NAME
 
     Returns:
         Corpus: returns an EMPTY object of class "Corpus"
     """
     recordings: list[Recording] = []
     speakers: set[str] = set()
-    dataset_path = Path(dataset_path)
+    dataset_path = Path(dataset_path).resolve()
 
-    return Corpus(dataset_path, recordings, speakers)
+    return Corpus(dataset_path, recordings, speakers, meta_file_name)
 
 
 class Corpus:
+    __slots__ = ("dataset_path", "recordings", "speakers", "meta_file_name")
+
     def __init__(
         self,
         dataset_path: pathlib.Path,
         recordings: list[Recording],
         speakers: set[str],
+        meta_file_name: str = META_FILE_NAME,
     ):
         self.dataset_path = dataset_path
         self.recordings = recordings
         self.speakers = speakers
+        self.meta_file_name = meta_file_name
+
+    @property
+    def _accent_index(self) -> dict[str, set[str]]:
+        """
+        Returns:
+            dict[str, set[str]]: capitalized accent -> speaker aliases, built only once per dataset_path
+        """
+        return _meta_index(os.fspath(self.dataset_path), self.meta_file_name)[0]
+
+    @property
+    def _gender_index(self) -> dict[str, set[str]]:
+        """
+        Returns:
+            dict[str, set[str]]: gender -> speaker aliases, built only once per dataset_path
+        """
+        return _meta_index(os.fspath(self.dataset_path), self.meta_file_name)[1]
 
     def add_speakers(self, *speakers: str) -> "Corpus":
         """Add speaker(s) to a new object of class "Corpus" by using Python Set union() method.
-        Before return, all recordings from all speakers in new_corpus are added to the object.
+        Before return, the recordings of this corpus and those of the newly added speakers are added to the object.
 
         Returns:
             Corpus: object of class "Corpus"
         """
-        new_corpus = make_corpus(self.dataset_path)
+        new_corpus = Corpus(self.dataset_path, [], set(), self.meta_file_name)
 
         new_corpus.speakers = self.speakers.union(speakers)
 
-        for speaker in new_corpus.speakers:
-            pathlist = Path(self.dataset_path, speaker).glob("*.wav")
-            for path in pathlist:
-                recording = read_recording(path)
-                new_corpus.recordings.append(recording)
-
-        return Corpus(
-            new_corpus.dataset_path, new_corpus.recordings, new_corpus.speakers
+        new_corpus.recordings = self.recordings + _read_recordings(
+            self.dataset_path, new_corpus.speakers - self.speakers
         )
 
+        return new_corpus
+
     def add_accent(self, accent: str) -> "Corpus":
         """Add speaker(s) to a new object of class "Corpus" with a unique accent specified in argument "accent: str".
-        The method loops through the dictionary and searches for the accent and adds the speaker alias to a new set.
+        The method looks up the speaker aliases with that accent in an index built once from the meta data.
         The speaker aliases are added to the "speakers" attribute.
-        Before return, all recordings from all speakers in new_corpus are added to the object.
+        Before return, the recordings of this corpus and those of the newly added speakers are added to the object.
 
         Returns:
             Corpus: object of class "Corpus"
         """
-        new_corpus = make_corpus(self.dataset_path)
+        new_corpus = Corpus(self.dataset_path, [], set(), self.meta_file_name)
 
-        meta_dict = read_meta_file(self.dataset_path)
-
-        new_speakers = set()
-        for speaker_alias in meta_dict.keys():
-            speakers_accent = list(meta_dict[speaker_alias].values())[0]
-            speakers_accent = speakers_accent.split("/")
-            speakers_accent_cap = [accents.capitalize() for accents in speakers_accent]
-            accent_cap = accent.capitalize()
-            if accent_cap in speakers_accent_cap:
-                new_speakers.add(speaker_alias)
+        new_speakers = self._accent_index.get(accent.capitalize(), set())
 
         new_corpus.speakers = self.speakers.union(new_speakers)
 
-        for speaker in new_corpus.speakers:
-            pathlist = Path(self.dataset_path, speaker).glob("*.wav")
-            for path in pathlist:
-                recording = read_recording(path)
-                new_corpus.recordings.append(recording)
-
-        return Corpus(
-            new_corpus.dataset_path, new_corpus.recordings, new_corpus.speakers
+        new_corpus.recordings = self.recordings + _read_recordings(
+            self.dataset_path, new_corpus.speakers - self.speakers
         )
 
+        return new_corpus
+
     def add_gender(self, gender: str) -> "Corpus":
         """Add speaker(s) to a new object of class "Corpus" with a gender specified in argument "gender: str".
-        The method loops through the dictionary and searches for the gender and adds the speaker alias to a new set.
+        The method looks up the speaker aliases with that gender in an index built once from the meta data.
         The speaker aliases are added to the "speakers" attribute.
-        Before return, all recordings from all speakers in new_corpus are added to the object.
+        Before return, the recordings of this corpus and those of the newly added speakers are added to the object.
 
         Returns:
             Corpus: object of class "Corpus"
         """
-        new_corpus = make_corpus(self.dataset_path)
+        new_corpus = Corpus(self.dataset_path, [], set(), self.meta_file_name)
 
-        meta_dict = read_meta_file(self.dataset_path)
-
-        new_speakers = set()
-        for speaker_alias in meta_dict.keys():
-            speakers_gender = list(meta_dict[speaker_alias].values())[2]
-            if speakers_gender == gender:
-                new_speakers.add(speaker_alias)
+        new_speakers = self._gender_index.get(gender, set())
 
         new_corpus.speakers = self.speakers.union(new_speakers)
 
-        for speaker in new_corpus.speakers:
-            pathlist = Path(self.dataset_path, speaker).glob("*.wav")
-            for path in pathlist:
-                recording = read_recording(path)
-                new_corpus.recordings.append(recording)
-
-        return Corpus(
-            new_corpus.dataset_path, new_corpus.recordings, new_corpus.speakers
+        new_corpus.recordings = self.recordings + _read_recordings(
+            self.dataset_path, new_corpus.speakers - self.speakers
         )
 
+        return new_corpus
+
     def __len__(self) -> int:
         """
         Returns:
             int: returns how many recordings are inside an object of class "Corpus"
         """
+        return len(self.recordings)
+
+    @property
+    def n_speakers(self) -> int:
+        """
+        Returns:
+            int: returns how many speakers are inside an object of class "Corpus"
+        """
         return len(self.speakers)
 
+    def as_batch(self) -> RecordingBatch:
+        """Turns the list of "Recording" objects into arrays, which suits vectorized or numba code downstream.
+
+        Returns:
+            RecordingBatch: object of class "RecordingBatch"
+        """
+        return RecordingBatch(
+            digit=np.fromiter((r.digit for r in self.recordings), np.int8),
+            index=np.fromiter((r.index for r in self.recordings), np.int32),
+            speaker=np.array([r.speaker for r in self.recordings], dtype="<U2"),
+            fs=np.fromiter((r.wav.fs for r in self.recordings), np.int32),
+            data=[r.wav.data for r in self.recordings],
+        )
+
     def __and__(self, other: "Corpus") -> "Corpus":
         """This method creates a new instance of class "Corpus" containing the intersection of two objects from type "Corpus".
 
         Returns:
             Corpus: object of class "Corpus"
         """
-        new_corpus = make_corpus(self.dataset_path)
-        if type(other) != Corpus:
+        if not isinstance(other, Corpus):
             return NotImplemented
 
+        new_corpus = Corpus(self.dataset_path, [], set(), self.meta_file_name)
+
         new_corpus.speakers = self.speakers & other.speakers
 
-        for speaker in new_corpus.speakers:
-            pathlist = Path(self.dataset_path, speaker).glob("*.wav")
-            for path in pathlist:
-                recording = read_recording(path)
-                new_corpus.recordings.append(recording)
+        new_corpus.recordings = _read_recordings(self.dataset_path, new_corpus.speakers)
 
-        return Corpus(
-            new_corpus.dataset_path, new_corpus.recordings, new_corpus.speakers
-        )
+        return new_corpus
@@ -0,0 +1,216 @@
+import json
+import os
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from digits import clear_cache, make_corpus, read_recording, read_wavfile
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def write_dataset(root, speakers, files_per_speaker):
+    for speaker in speakers:
+        os.makedirs(root / speaker)
+        for index in range(files_per_speaker):
+            file_name = f"{index % 10}_{speaker}_{index}.wav"
+            with wave.open(str(root / speaker / file_name), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(48000)
+                wav.writeframes(np.arange(index, index + 100, dtype=np.int16).tobytes())
+
+
+def write_riff(file_path, *chunks):
+    body = b"".join(
+        struct.pack("<4sI", chunk_id, len(chunk)) + chunk + b"\0" * (len(chunk) & 1)
+        for chunk_id, chunk in chunks
+    )
+    riff = struct.pack("<4sI4s", b"RIFF", 4 + len(body), b"WAVE")
+    file_path.write_bytes(riff + body)
+
+
+def test_read_wavfile_walks_chunks_before_fmt_and_data(tmp_path):
+    samples = np.arange(-5, 5, dtype=np.int16)
+    fmt = struct.pack("<HHIIHH", 1, 2, 8000, 32000, 4, 16)
+    write_riff(
+        tmp_path / "0_01_0.wav",
+        (b"JUNK", b"odd"),
+        (b"fmt ", fmt),
+        (b"LIST", b"INFOsome text"),
+        (b"data", samples.tobytes()),
+    )
+
+    wav = read_wavfile(tmp_path / "0_01_0.wav")
+
+    assert (wav.n_channels, wav.fs, wav.bits_per_sample) == (2, 8000, 16)
+    np.testing.assert_array_equal(wav.data, samples)
+
+
+def test_read_wavfile_rejects_missing_data_and_unsupported_bit_depth(tmp_path):
+    fmt = struct.pack("<HHIIHH", 1, 1, 8000, 16000, 2, 16)
+    write_riff(tmp_path / "no_data.wav", (b"fmt ", fmt))
+    write_riff(
+        tmp_path / "8_bit.wav",
+        (b"fmt ", struct.pack("<HHIIHH", 1, 1, 8000, 8000, 1, 8)),
+        (b"data", bytes(10)),
+    )
+
+    with pytest.raises(ValueError, match="data"):
+        read_wavfile(tmp_path / "no_data.wav")
+    with pytest.raises(ValueError, match="bits per sample"):
+        read_wavfile(tmp_path / "8_bit.wav")
+
+
+def test_add_speakers_loads_more_files_than_open_file_limit(tmp_path):
+    resource = pytest.importorskip("resource")
+    limit = 128
+    write_dataset(tmp_path, ["01", "02", "03"], limit // 2)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    try:
+        corpus = make_corpus(tmp_path).add_speakers("01", "02", "03")
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    assert len(corpus) == 3 * (limit // 2) > limit
+
+
+def test_read_wavfile_mmap_matches_copy(tmp_path):
+    write_dataset(tmp_path, ["01"], 1)
+    file_path = tmp_path / "01" / "0_01_0.wav"
+
+    copied = read_wavfile(file_path)
+    mapped = read_wavfile(file_path, use_mmap=True)
+
+    assert copied.buffer is None
+    np.testing.assert_array_equal(mapped.data, copied.data)
+    mapped.close()
+    assert mapped.buffer is None and mapped.data.size == 0
+
+
+def test_close_with_live_view_leaves_wavfile_unchanged(tmp_path):
+    write_dataset(tmp_path, ["01"], 1)
+    wav = read_wavfile(tmp_path / "01" / "0_01_0.wav", use_mmap=True)
+    view = wav.data
+
+    with pytest.raises(BufferError):
+        wav.close()
+
+    assert not wav.buffer.closed
+    np.testing.assert_array_equal(wav.data, np.arange(100, dtype=np.int16))
+
+    del view
+    wav.close()
+    assert wav.buffer is None
+
+
+def test_cached_recordings_survive_close_and_are_read_only(tmp_path):
+    write_dataset(tmp_path, ["01"], 2)
+    first = make_corpus(tmp_path).add_speakers("01")
+    second = make_corpus(tmp_path).add_speakers("01")
+
+    for recording in first.recordings:
+        recording.wav.close()
+
+    assert all(recording.wav.data.size == 100 for recording in second.recordings)
+    with pytest.raises(ValueError):
+        second.recordings[0].wav.data[0] = 0
+
+
+def test_batch_as_float32_matches_wavfile_as_float32(tmp_path):
+    write_dataset(tmp_path, ["01", "02"], 3)
+    corpus = make_corpus(tmp_path).add_speakers("01", "02")
+
+    converted = corpus.as_batch().as_float32()
+
+    assert len(converted) == len(corpus)
+    for recording, samples in zip(corpus.recordings, converted):
+        assert samples.dtype == np.float32
+        np.testing.assert_array_equal(samples, recording.wav.as_float32())
+    assert make_corpus(tmp_path).as_batch().as_float32() == []
+
+
+def test_add_gender_reads_meta_file_with_custom_name(tmp_path):
+    write_dataset(tmp_path, ["01", "02"], 1)
+    meta = {"01": {"accent": "german", "gender": "male"}}
+    (tmp_path / "speakers.txt").write_text(json.dumps(meta))
+
+    corpus = make_corpus(tmp_path, "speakers.txt").add_speakers("02").add_gender("male")
+
+    assert corpus.speakers == {"01", "02"}
+    with pytest.raises(FileNotFoundError):
+        make_corpus(tmp_path).add_gender("male")
+
+
+def test_read_recording_cache_is_keyed_on_absolute_path(tmp_path, monkeypatch):
+    for name, value in [("a", 1), ("b", 2)]:
+        speaker_path = tmp_path / name / "data" / "01"
+        os.makedirs(speaker_path)
+        with wave.open(str(speaker_path / "0_01_0.wav"), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(48000)
+            wav.writeframes(np.full(4, value, dtype=np.int16).tobytes())
+
+    monkeypatch.chdir(tmp_path / "a")
+    first = read_recording(os.path.join("data", "01", "0_01_0.wav"))
+    monkeypatch.chdir(tmp_path / "b")
+    second = read_recording(os.path.join("data", "01", "0_01_0.wav"))
+
+    np.testing.assert_array_equal(first.wav.data, [1, 1, 1, 1])
+    np.testing.assert_array_equal(second.wav.data, [2, 2, 2, 2])
+
+
+def write_meta(root):
+    meta = {
+        "01": {"accent": "german", "age": 30, "gender": "male"},
+        "02": {"accent": "German/English", "age": 25, "gender": "female"},
+        "03": {"accent": "english", "age": 40, "gender": "male"},
+    }
+    (root / "audioMNIST_meta.txt").write_text(json.dumps(meta))
+
+
+def test_add_accent_is_case_insensitive_and_splits_accents(tmp_path):
+    write_dataset(tmp_path, ["01", "02", "03"], 2)
+    write_meta(tmp_path)
+    corpus = make_corpus(tmp_path)
+
+    assert corpus.add_accent("GERMAN").speakers == {"01", "02"}
+    assert corpus.add_accent("english").speakers == {"02", "03"}
+    assert corpus.add_accent("danish").speakers == set()
+
+
+def test_add_gender_matches_exactly(tmp_path):
+    write_dataset(tmp_path, ["01", "02", "03"], 2)
+    write_meta(tmp_path)
+    corpus = make_corpus(tmp_path)
+
+    assert corpus.add_gender("male").speakers == {"01", "03"}
+    assert corpus.add_gender("Male").speakers == set()
+
+
+def test_len_and_n_speakers_after_chaining(tmp_path):
+    write_dataset(tmp_path, ["01", "02", "03"], 2)
+    write_meta(tmp_path)
+
+    corpus = make_corpus(tmp_path).add_speakers("01").add_gender("female")
+    corpus = corpus.add_accent("german")
+
+    assert corpus.n_speakers == 2
+    assert len(corpus) == 4
+    assert sorted(recording.speaker for recording in corpus.recordings) == [
+        "01",
+        "01",
+        "02",
+        "02",
+    ]
+    assert len(corpus & make_corpus(tmp_path).add_speakers("02", "03")) == 2